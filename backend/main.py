@@ -1,25 +1,63 @@
-from fastapi import FastAPI, HTTPException, Depends, status
+from fastapi import FastAPI, HTTPException, Depends, Request, Response, status
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from pydantic import BaseModel, EmailStr, validator
 from typing import Optional, List
+from contextlib import asynccontextmanager, suppress
+from dataclasses import dataclass, field, asdict
 import chess
 import chess.pgn
 import jwt
 import bcrypt
 import httpx
 import smtplib
-import json
+import orjson
 import os
-from datetime import datetime, timedelta
+import mmap
+import hashlib
+import asyncio
+import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from heapq import nlargest
+from cachetools import TTLCache
+from datetime import datetime, timezone
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 import re
 
+from passwords import bcrypt_hash
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Open the shared HTTP client, bcrypt pool and users change log for the app's lifetime"""
+    app.state.http = httpx.AsyncClient(
+        http2=True,
+        timeout=15.0,
+        limits=httpx.Limits(max_connections=100, max_keepalive_connections=50)
+    )
+    app.state.bcrypt_pool = ProcessPoolExecutor(max_workers=os.cpu_count())
+    global users_log
+    users_log = open(USERS_LOG_FILE, 'ab', buffering=65536)
+    persist_task = asyncio.create_task(persist_users_db())
+    try:
+        yield
+    finally:
+        persist_task.cancel()
+        with suppress(asyncio.CancelledError):
+            await persist_task
+        sync_users_log()
+        users_log.close()
+        await app.state.http.aclose()
+        app.state.bcrypt_pool.shutdown(cancel_futures=True)
+
 app = FastAPI(
     title="Chess Learning Platform API",
     description="Interactive chess learning backend with user authentication",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse
 )
 
 # Configuration
@@ -34,6 +72,14 @@ EMAIL_ENABLED = False  # Set to True when you configure real email
 # Security
 security = HTTPBearer()
 
+# bcrypt is CPU-bound, so it runs in worker processes (app.state.bcrypt_pool,
+# created per lifespan) to keep the event loop free
+_bcrypt_slots = asyncio.Semaphore(2 * (os.cpu_count() or 1))
+
+# Recent games per (platform, chess username, limit), as (body, etag)
+GAMES_CACHE_TTL_SECONDS = 60
+games_cache = TTLCache(maxsize=1024, ttl=GAMES_CACHE_TTL_SECONDS)
+
 # Enable CORS for frontend
 app.add_middleware(
     CORSMiddleware,
@@ -43,34 +89,150 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+@dataclass(slots=True)
+class UserRecord:
+    """In-memory user record; password hashes are kept in password_hashes"""
+    id: str
+    username: str
+    email: str
+    created_at: int  # Unix epoch seconds
+    chess_accounts: dict = field(default_factory=dict)
+    games_imported: int = 0
+    email_verified: bool = False
+    
+    @classmethod
+    def from_stored(cls, data: dict) -> "UserRecord":
+        created_at = data["created_at"]
+        if isinstance(created_at, str):
+            # Older snapshots stored naive UTC datetimes as ISO strings
+            created_at = datetime.fromisoformat(created_at).replace(tzinfo=timezone.utc).timestamp()
+        return cls(**{**data, "created_at": int(created_at)})
+
 # Persistent storage using JSON files (replace with real database in production)
 USERS_FILE = "users_db.json"
 SESSIONS_FILE = "user_sessions.json"
+USERS_LOG_FILE = "users_db.log"
+USERS_LOG_ROTATED_FILE = "users_db.log.1"
+USERS_LOG_SYNC_SECONDS = 1.0
+USERS_SNAPSHOT_SECONDS = 300
+USERS_SNAPSHOT_CHANGES = 1000
+
+def read_json_file(path):
+    """Parse a JSON file straight from a read-only memory map"""
+    with open(path, 'rb') as f:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            # orjson takes a memoryview, not an mmap; release it before the map closes
+            with memoryview(mm) as view:
+                return orjson.loads(view)
+
+def replay_users_log(users_db, path):
+    """Apply logged user changes on top of the loaded snapshot"""
+    if not os.path.exists(path):
+        return
+    with open(path, 'rb') as f:
+        for line in f:
+            try:
+                entry = orjson.loads(line)
+            except orjson.JSONDecodeError:
+                continue  # Torn last line after a crash
+            if entry.get("op") == "upsert":
+                users_db[entry["id"]] = entry["user"]
 
 def load_users_db():
-    """Load users from JSON file"""
+    """Load users from the JSON snapshot and replay the change log over it"""
+    users_db = {}
     if os.path.exists(USERS_FILE):
         try:
-            with open(USERS_FILE, 'r') as f:
-                return json.load(f)
+            users_db = read_json_file(USERS_FILE)
         except:
-            return {}
-    return {}
-
-def save_users_db(users_db):
-    """Save users to JSON file"""
+            users_db = {}
+    replay_users_log(users_db, USERS_LOG_ROTATED_FILE)
+    replay_users_log(users_db, USERS_LOG_FILE)
+    return users_db
+
+def split_stored_users(stored_users):
+    """Build UserRecords from stored user dicts, returning the password hashes separately"""
+    users_db = {}
+    password_hashes = {}
+    for user_id, user in stored_users.items():
+        if "password" in user:
+            password_hashes[user_id] = user.pop("password")
+        users_db[user_id] = UserRecord.from_stored(user)
+    return users_db, password_hashes
+
+def stored_user(user_id):
+    """User record as persisted on disk, with its password hash merged back in"""
+    return {**asdict(users_db[user_id]), "password": password_hashes.get(user_id)}
+
+def log_user_change(user: UserRecord):
+    """Append a user record to the change log (fsynced by persist_users_db)"""
+    global pending_user_changes
     try:
-        with open(USERS_FILE, 'w') as f:
-            json.dump(users_db, f, indent=2, default=str)
+        entry = {"op": "upsert", "id": user.id, "user": stored_user(user.id)}
+        users_log.write(orjson.dumps(entry, default=str) + b"\n")
+        pending_user_changes += 1
     except Exception as e:
-        print(f"Error saving users database: {e}")
+        print(f"Error logging user change: {e}")
+
+def sync_users_log():
+    """Flush buffered log writes and fsync them to disk"""
+    users_log.flush()
+    os.fsync(users_log.fileno())
+
+def rotate_users_log():
+    """Start a fresh change log and serialize the current users snapshot"""
+    global users_log, pending_user_changes
+    # If a previous snapshot failed, its rotated log is still needed; keep appending
+    if not os.path.exists(USERS_LOG_ROTATED_FILE):
+        users_log.close()
+        os.replace(USERS_LOG_FILE, USERS_LOG_ROTATED_FILE)
+        users_log = open(USERS_LOG_FILE, 'ab', buffering=65536)
+    pending_user_changes = 0
+    snapshot = {user_id: stored_user(user_id) for user_id in users_db}
+    return orjson.dumps(snapshot, default=str, option=orjson.OPT_INDENT_2)
+
+def write_users_snapshot(data: bytes):
+    """Atomically replace the users snapshot, then drop the rotated log"""
+    tmp_file = USERS_FILE + ".tmp"
+    with open(tmp_file, 'wb') as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_file, USERS_FILE)
+    if os.path.exists(USERS_LOG_ROTATED_FILE):
+        os.remove(USERS_LOG_ROTATED_FILE)
+
+async def run_in_thread_to_completion(func, *args):
+    """Run func in a thread; if cancelled, still wait for it before re-raising"""
+    future = asyncio.ensure_future(asyncio.to_thread(func, *args))
+    try:
+        return await asyncio.shield(future)
+    except asyncio.CancelledError:
+        await future
+        raise
+
+async def persist_users_db():
+    """Periodically fsync the change log and compact it into a snapshot"""
+    last_snapshot = time.monotonic()
+    while True:
+        await asyncio.sleep(USERS_LOG_SYNC_SECONDS)
+        try:
+            await run_in_thread_to_completion(sync_users_log)
+            if pending_user_changes and (
+                pending_user_changes >= USERS_SNAPSHOT_CHANGES
+                or time.monotonic() - last_snapshot >= USERS_SNAPSHOT_SECONDS
+            ):
+                data = rotate_users_log()
+                await run_in_thread_to_completion(write_users_snapshot, data)
+                last_snapshot = time.monotonic()
+        except Exception as e:
+            print(f"Error saving users database: {e}")
 
 def load_sessions():
     """Load sessions from JSON file"""
     if os.path.exists(SESSIONS_FILE):
         try:
-            with open(SESSIONS_FILE, 'r') as f:
-                return json.load(f)
+            return read_json_file(SESSIONS_FILE)
         except:
             return {}
     return {}
@@ -78,14 +240,29 @@ def load_sessions():
 def save_sessions(sessions):
     """Save sessions to JSON file"""
     try:
-        with open(SESSIONS_FILE, 'w') as f:
-            json.dump(sessions, f, indent=2, default=str)
+        with open(SESSIONS_FILE, 'wb') as f:
+            f.write(orjson.dumps(sessions, default=str, option=orjson.OPT_INDENT_2))
     except Exception as e:
         print(f"Error saving sessions: {e}")
 
+def build_user_indexes(users_db):
+    """Map lowercase usernames and emails to user ids for O(1) lookups"""
+    username_index = {user.username.lower(): user_id for user_id, user in users_db.items()}
+    email_index = {user.email.lower(): user_id for user_id, user in users_db.items()}
+    return username_index, email_index
+
 # Load persistent data
-users_db = load_users_db()
+users_db, password_hashes = split_stored_users(load_users_db())
 user_sessions = load_sessions()
+username_index, email_index = build_user_indexes(users_db)
+users_log = None  # Opened by lifespan
+pending_user_changes = 0
+
+# Validation patterns, compiled once at import
+USERNAME_PATTERN = re.compile(r'^[a-zA-Z0-9_]+$')
+LOWERCASE_PATTERN = re.compile(r'[a-z]')
+UPPERCASE_PATTERN = re.compile(r'[A-Z]')
+PASSWORD_NUMBERS_AND_SYMBOLS = frozenset('0123456789!@#$%^&*()_+-=[]{};\':"\\|,.<>/?')
 
 # Pydantic models
 class UserCreate(BaseModel):
@@ -97,7 +274,7 @@ class UserCreate(BaseModel):
     def validate_username(cls, v):
         if len(v) < 3:
             raise ValueError('Username must be at least 3 characters long')
-        if not re.match(r'^[a-zA-Z0-9_]+$', v):
+        if not USERNAME_PATTERN.match(v):
             raise ValueError('Username can only contain letters, numbers, and underscores')
         return v
     
@@ -105,11 +282,11 @@ class UserCreate(BaseModel):
     def validate_password(cls, v):
         if len(v) < 8:
             raise ValueError('Password must be at least 8 characters long')
-        if not re.search(r'[a-z]', v):
+        if not LOWERCASE_PATTERN.search(v):
             raise ValueError('Password must contain at least one lowercase letter')
-        if not re.search(r'[A-Z]', v):
+        if not UPPERCASE_PATTERN.search(v):
             raise ValueError('Password must contain at least one uppercase letter')
-        if not re.search(r'[0-9!@#$%^&*()_+\-=\[\]{};\':"\\|,.<>\/?]', v):
+        if PASSWORD_NUMBERS_AND_SYMBOLS.isdisjoint(v):
             raise ValueError('Password must contain at least one number or symbol')
         return v
 
@@ -129,6 +306,15 @@ class User(BaseModel):
     created_at: datetime
     games_imported: int = 0
     email_verified: bool = False
+    
+    @validator('chess_accounts')
+    def format_linked_at(cls, v):
+        # linked_at is stored as epoch seconds; respond with a datetime like created_at
+        return {
+            platform: {**account, "linked_at": datetime.fromtimestamp(account["linked_at"], timezone.utc)}
+            if isinstance(account.get("linked_at"), (int, float)) else account
+            for platform, account in v.items()
+        }
 
 class Token(BaseModel):
     access_token: str
@@ -136,16 +322,28 @@ class Token(BaseModel):
     user: User
 
 # Utility functions
-def hash_password(password: str) -> str:
-    return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
-
-def verify_password(password: str, hashed_password: str) -> bool:
-    return bcrypt.checkpw(password.encode('utf-8'), hashed_password.encode('utf-8'))
+async def run_bcrypt(func, *args):
+    """Run a bcrypt call in the process pool, rejecting with 503 when saturated"""
+    if _bcrypt_slots.locked():
+        raise HTTPException(
+            status_code=503,
+            detail="Server busy, please try again",
+            headers={"Retry-After": "1"}
+        )
+    async with _bcrypt_slots:
+        return await asyncio.get_running_loop().run_in_executor(app.state.bcrypt_pool, func, *args)
+
+async def hash_password(password: str) -> str:
+    hashed = await run_bcrypt(bcrypt_hash, password.encode('utf-8'))
+    return hashed.decode('utf-8')
+
+async def verify_password(password: str, hashed_password: str) -> bool:
+    return await run_bcrypt(bcrypt.checkpw, password.encode('utf-8'), hashed_password.encode('utf-8'))
 
 def create_access_token(user_id: str) -> str:
     payload = {
         "user_id": user_id,
-        "exp": datetime.utcnow() + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
+        "exp": int(time.time()) + ACCESS_TOKEN_EXPIRE_MINUTES * 60
     }
     return jwt.encode(payload, SECRET_KEY, algorithm=ALGORITHM)
 
@@ -170,91 +368,102 @@ def send_welcome_email(email: str, username: str):
         print(f"Failed to send email: {e}")
         return False
 
-async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)) -> dict:
+@lru_cache(maxsize=4096)
+def decode_access_token(token: str) -> tuple:
+    """Verify a token's signature once and cache its (user_id, exp) claims"""
+    payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM], options={"require": ["exp"]})
+    return payload.get("user_id"), payload["exp"]
+
+async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)) -> UserRecord:
     try:
-        payload = jwt.decode(credentials.credentials, SECRET_KEY, algorithms=[ALGORITHM])
-        user_id = payload.get("user_id")
+        user_id, exp = decode_access_token(credentials.credentials)
+        # Cached tokens skip jwt.decode, so expiry has to be checked here too
+        if exp <= time.time():
+            raise HTTPException(status_code=401, detail="Token expired")
         if user_id is None or user_id not in users_db:
             raise HTTPException(status_code=401, detail="Invalid token")
         return users_db[user_id]
     except jwt.ExpiredSignatureError:
         raise HTTPException(status_code=401, detail="Token expired")
-    except jwt.JWTError:
+    except jwt.InvalidTokenError:
         raise HTTPException(status_code=401, detail="Invalid token")
 
+def check_user_available(username_key: str, email_key: str):
+    if username_key in username_index:
+        raise HTTPException(status_code=400, detail="Username already exists")
+    if email_key in email_index:
+        raise HTTPException(status_code=400, detail="Email already exists")
+
 # Authentication endpoints
 @app.post("/api/auth/register", response_model=Token)
 async def register_user(user_data: UserCreate):
     """Register a new user"""
+    username_key = user_data.username.lower()
+    email_key = user_data.email.lower()
+    
     # Check if username or email already exists
-    for user in users_db.values():
-        if user["username"].lower() == user_data.username.lower():
-            raise HTTPException(status_code=400, detail="Username already exists")
-        if user["email"].lower() == user_data.email.lower():
-            raise HTTPException(status_code=400, detail="Email already exists")
+    check_user_available(username_key, email_key)
+    
+    hashed_password = await hash_password(user_data.password)
+    
+    # Re-check: another registration may have claimed the name while hashing
+    check_user_available(username_key, email_key)
     
     # Create new user
     user_id = f"user_{len(users_db) + 1}"
-    hashed_password = hash_password(user_data.password)
-    
-    user = {
-        "id": user_id,
-        "username": user_data.username,
-        "email": user_data.email,
-        "password": hashed_password,
-        "chess_accounts": {},
-        "created_at": datetime.utcnow(),
-        "games_imported": 0,
-        "email_verified": False
-    }
+    
+    user = UserRecord(
+        id=user_id,
+        username=user_data.username,
+        email=user_data.email,
+        created_at=int(time.time())
+    )
     
     users_db[user_id] = user
-    save_users_db(users_db)  # Persist to file
+    password_hashes[user_id] = hashed_password
+    username_index[username_key] = user_id
+    email_index[email_key] = user_id
+    log_user_change(user)  # Persist to file
     
     # Send welcome email
     send_welcome_email(user_data.email, user_data.username)
     
     access_token = create_access_token(user_id)
     
-    user_response = User(**{k: v for k, v in user.items() if k != "password"})
-    
-    return Token(
-        access_token=access_token,
-        token_type="bearer",
-        user=user_response
-    )
+    return {
+        "access_token": access_token,
+        "token_type": "bearer",
+        "user": user
+    }
 
 @app.post("/api/auth/login", response_model=Token)
 async def login_user(user_data: UserLogin):
     """Login user"""
-    user = None
-    for u in users_db.values():
-        if u["username"].lower() == user_data.username.lower():
-            user = u
-            break
+    user_id = username_index.get(user_data.username.lower())
+    user = users_db.get(user_id)
     
-    if not user or not verify_password(user_data.password, user["password"]):
+    if not user or not await verify_password(user_data.password, password_hashes[user_id]):
         raise HTTPException(status_code=401, detail="Invalid credentials")
     
-    access_token = create_access_token(user["id"])
-    user_response = User(**{k: v for k, v in user.items() if k != "password"})
+    access_token = create_access_token(user.id)
     
-    return Token(
-        access_token=access_token,
-        token_type="bearer",
-        user=user_response
-    )
+    return {
+        "access_token": access_token,
+        "token_type": "bearer",
+        "user": user
+    }
 
 @app.get("/api/auth/me", response_model=User)
-async def get_current_user_info(current_user: dict = Depends(get_current_user)):
+async def get_current_user_info(current_user: UserRecord = Depends(get_current_user)):
     """Get current user information"""
-    return User(**{k: v for k, v in current_user.items() if k != "password"})
+    return current_user
 
 # Chess account linking endpoints
 @app.post("/api/chess-accounts/link")
 async def link_chess_account(
     account_data: ChessAccountLink,
-    current_user: dict = Depends(get_current_user)
+    request: Request,
+    current_user: UserRecord = Depends(get_current_user)
 ):
     """Link a chess.com or lichess.org account"""
     platform = account_data.platform.lower()
@@ -263,32 +472,33 @@ async def link_chess_account(
     if platform not in ["chess.com", "lichess.org"]:
         raise HTTPException(status_code=400, detail="Platform must be chess.com or lichess.org")
     
+    client = request.app.state.http
+    
     # Verify the account exists
     try:
         if platform == "chess.com":
-            async with httpx.AsyncClient() as client:
-                response = await client.get(f"https://api.chess.com/pub/player/{username}")
-                if response.status_code != 200:
-                    raise HTTPException(status_code=404, detail="Chess.com account not found")
-                player_data = response.json()
+            response = await client.get(f"https://api.chess.com/pub/player/{username}")
+            if response.status_code != 200:
+                raise HTTPException(status_code=404, detail="Chess.com account not found")
+            player_data = orjson.loads(response.content)
                 
         elif platform == "lichess.org":
-            async with httpx.AsyncClient() as client:
-                response = await client.get(f"https://lichess.org/api/user/{username}")
-                if response.status_code != 200:
-                    raise HTTPException(status_code=404, detail="Lichess account not found")
-                player_data = response.json()
+            response = await client.get(f"https://lichess.org/api/user/{username}")
+            if response.status_code != 200:
+                raise HTTPException(status_code=404, detail="Lichess account not found")
+            player_data = orjson.loads(response.content)
         
         # Store the linked account
-        current_user["chess_accounts"][platform] = {
+        current_user.chess_accounts[platform] = {
             "username": username,
-            "linked_at": datetime.utcnow(),
+            "linked_at": int(time.time()),
             "verified": True,
             "player_data": player_data
         }
         
         # Save to persistent storage
-        save_users_db(users_db)
+        log_user_change(current_user)
+        invalidate_games_cache(platform, username)
         
         return {
             "success": True,
@@ -302,101 +512,182 @@ async def link_chess_account(
 @app.get("/api/chess-accounts/games/{platform}")
 async def get_chess_games(
     platform: str,
+    request: Request,
     limit: int = 10,
-    current_user: dict = Depends(get_current_user)
+    current_user: UserRecord = Depends(get_current_user)
 ):
     """Fetch recent games from linked chess account with improved logic"""
     platform = platform.lower()
     
-    if platform not in current_user["chess_accounts"]:
+    if platform not in current_user.chess_accounts:
         raise HTTPException(status_code=404, detail=f"No {platform} account linked")
     
-    chess_username = current_user["chess_accounts"][platform]["username"]
+    chess_username = current_user.chess_accounts[platform]["username"]
+    client = request.app.state.http
     
+    cache_key = (platform, chess_username, limit)
+    cached = games_cache.get(cache_key)
+    if cached is None:
+        try:
+            if platform == "chess.com":
+                games, months_failed = await fetch_chess_com_games(chess_username, limit, client)
+            elif platform == "lichess.org":
+                games = await fetch_lichess_games(chess_username, limit, client)
+                months_failed = 0  # Lichess failures raise instead
+                        
+        except httpx.RequestError:
+            raise HTTPException(status_code=500, detail="Failed to fetch games from chess platform")
+        
+        body = orjson.dumps(games)
+        cached = (body, f'"{hashlib.sha1(body).hexdigest()}"')
+        # Don't keep serving a partial result after a transient upstream failure
+        if not months_failed:
+            games_cache[cache_key] = cached
+    
+    body, etag = cached
+    # no-cache makes the browser revalidate every time, so link/unlink takes effect
+    # immediately; the URL doesn't identify the user, hence Vary: Authorization
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache", "Vary": "Authorization"}
+    if etag_matches(request.headers.get("if-none-match", ""), etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    """Weak comparison of an If-None-Match header against our ETag"""
+    for tag in if_none_match.split(","):
+        tag = tag.strip()
+        if tag == "*" or tag.removeprefix("W/") == etag:
+            return True
+    return False
+
+def invalidate_games_cache(platform: str, chess_username: str):
+    """Drop cached games for an account, whatever limit they were fetched with"""
+    for key in [key for key in games_cache if key[:2] == (platform, chess_username)]:
+        games_cache.pop(key, None)
+
+async def fetch_chess_com_month(client: httpx.AsyncClient, username: str, year_month: str):
+    """Fetch one month of Chess.com games, returning None if the fetch failed"""
     try:
-        if platform == "chess.com":
-            return await fetch_chess_com_games(chess_username, limit)
-        elif platform == "lichess.org":
-            return await fetch_lichess_games(chess_username, limit)
-                    
-    except httpx.RequestError:
-        raise HTTPException(status_code=500, detail="Failed to fetch games from chess platform")
+        print(f"Fetching Chess.com games for {username} from {year_month}")
+        response = await client.get(
+            f"https://api.chess.com/pub/player/{username}/games/{year_month}",
+            timeout=10.0
+        )
+        
+        if response.status_code == 200:
+            games_data = orjson.loads(response.content)
+            month_games = games_data.get("games", [])
+            print(f"Found {len(month_games)} games in {year_month}")
+            return month_games
+        elif response.status_code == 404:
+            print(f"No games found for {year_month}")
+            return []
+        else:
+            print(f"Error fetching {year_month}: {response.status_code}")
+            
+    except httpx.TimeoutException:
+        print(f"Timeout fetching games for {year_month}")
+    except Exception as e:
+        print(f"Error fetching games for {year_month}: {e}")
+    
+    return None
+
+def process_chess_com_game(game: dict) -> dict:
+    """Flatten a Chess.com archive game for the frontend"""
+    get = game.get
+    white = get("white") or {}
+    black = get("black") or {}
+    return {
+        "id": get("uuid"),
+        "white_result": white.get("result"),
+        "black_result": black.get("result"),
+        "time_control": get("time_control"),
+        "end_time": get("end_time"),
+        "pgn": get("pgn"),
+        "url": get("url"),
+        "time_class": get("time_class"),
+        "white": {
+            "username": white.get("username"),
+            "rating": white.get("rating")
+        },
+        "black": {
+            "username": black.get("username"),
+            "rating": black.get("rating")
+        }
+    }
+
+def process_lichess_game(game: dict) -> dict:
+    """Flatten a Lichess NDJSON game for the frontend"""
+    get = game.get
+    players = get("players") or {}
+    white_player = players.get("white") or {}
+    black_player = players.get("black") or {}
+    clock = get("clock") or {}
+    game_id = get("id")
+    return {
+        "id": game_id,
+        "result": get("status"),
+        "time_control": f"{clock.get('initial', 0)}+{clock.get('increment', 0)}",
+        "end_time": get("lastMoveAt", 0) // 1000,  # Convert to seconds
+        "moves": get("moves"),
+        "url": f"https://lichess.org/{game_id}",
+        "pgn": get("pgn", ""),
+        "white": {
+            "username": (white_player.get("user") or {}).get("name"),
+            "rating": white_player.get("rating")
+        },
+        "black": {
+            "username": (black_player.get("user") or {}).get("name"),
+            "rating": black_player.get("rating")
+        }
+    }
 
-async def fetch_chess_com_games(username: str, limit: int):
-    """Fetch Chess.com games across multiple months if needed"""
-    all_games = []
-    current_date = datetime.utcnow()
-    months_checked = 0
+async def fetch_chess_com_games(username: str, limit: int, client: httpx.AsyncClient):
+    """Fetch Chess.com games across multiple months if needed, plus a count of failed months"""
+    current_date = time.gmtime()
     max_months_to_check = 6  # Don't go back more than 6 months
     
-    async with httpx.AsyncClient() as client:
-        while len(all_games) < limit and months_checked < max_months_to_check:
-            year_month = f"{current_date.year}/{current_date.month:02d}"
-            
-            try:
-                print(f"Fetching Chess.com games for {username} from {year_month}")
-                response = await client.get(
-                    f"https://api.chess.com/pub/player/{username}/games/{year_month}",
-                    timeout=10.0
-                )
-                
-                if response.status_code == 200:
-                    games_data = response.json()
-                    month_games = games_data.get("games", [])
-                    print(f"Found {len(month_games)} games in {year_month}")
-                    
-                    # Add games from this month
-                    all_games.extend(month_games)
-                    
-                    # If we got no games this month and we already have some games, stop
-                    if len(month_games) == 0 and len(all_games) > 0:
-                        break
-                        
-                elif response.status_code == 404:
-                    print(f"No games found for {year_month}")
-                    # Continue to previous month
-                else:
-                    print(f"Error fetching {year_month}: {response.status_code}")
-                    
-            except httpx.TimeoutException:
-                print(f"Timeout fetching games for {year_month}")
-            except Exception as e:
-                print(f"Error fetching games for {year_month}: {e}")
-            
-            # Go to previous month
-            if current_date.month == 1:
-                current_date = current_date.replace(year=current_date.year - 1, month=12)
-            else:
-                current_date = current_date.replace(month=current_date.month - 1)
-            
-            months_checked += 1
+    # Newest month first, going back one month at a time
+    year_months = []
+    for offset in range(max_months_to_check):
+        year, month = divmod(current_date.tm_year * 12 + current_date.tm_mon - 1 - offset, 12)
+        year_months.append(f"{year}/{month + 1:02d}")
+    
+    # Request every month at once, keyed by its offset from the current month
+    tasks = {
+        asyncio.create_task(fetch_chess_com_month(client, username, year_month)): offset
+        for offset, year_month in enumerate(year_months)
+    }
+    games_by_month = {}
+    newest_months = 0  # Consecutive months fetched, starting from the current one
+    newest_games = 0
+    months_failed = 0
+    pending = set(tasks)
+    try:
+        # Older months stop mattering once the newest consecutive months cover the limit
+        while pending and newest_games < limit:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                month_games = task.result()
+                if month_games is None:
+                    months_failed += 1
+                    month_games = []
+                games_by_month[tasks[task]] = month_games
+            while newest_months in games_by_month:
+                newest_games += len(games_by_month[newest_months])
+                newest_months += 1
+    finally:
+        for task in pending:
+            task.cancel()
+    
+    all_games = [game for month_games in games_by_month.values() for game in month_games]
+    months_checked = len(games_by_month)
     
-    # Sort games by end_time (newest first) and limit
-    all_games.sort(key=lambda x: x.get("end_time", 0), reverse=True)
-    limited_games = all_games[:limit]
+    # Keep the newest games by end_time without sorting the whole list
+    limited_games = nlargest(limit, all_games, key=lambda x: x.get("end_time", 0))
     
     # Process games for easier frontend consumption
-    processed_games = []
-    for game in limited_games:
-        processed_games.append({
-            "id": game.get("uuid"),
-            "white": game.get("white", {}).get("username"),
-            "black": game.get("black", {}).get("username"),
-            "result": game.get("white", {}).get("result"),
-            "time_control": game.get("time_control"),
-            "end_time": game.get("end_time"),
-            "pgn": game.get("pgn"),
-            "url": game.get("url"),
-            "time_class": game.get("time_class"),
-            "white": {
-                "username": game.get("white", {}).get("username"),
-                "rating": game.get("white", {}).get("rating")
-            },
-            "black": {
-                "username": game.get("black", {}).get("username"),
-                "rating": game.get("black", {}).get("rating")
-            }
-        })
+    processed_games = [process_chess_com_game(game) for game in limited_games]
     
     return {
         "platform": "chess.com",
@@ -406,86 +697,61 @@ async def fetch_chess_com_games(username: str, limit: int):
         "requested": limit,
         "months_checked": months_checked,
         "message": f"Found {len(processed_games)} games across {months_checked} months"
-    }
+    }, months_failed
 
-async def fetch_lichess_games(username: str, limit: int):
+async def fetch_lichess_games(username: str, limit: int, client: httpx.AsyncClient):
     """Fetch Lichess games with improved error handling"""
-    async with httpx.AsyncClient() as client:
-        try:
-            print(f"Fetching Lichess games for {username}, limit: {limit}")
-            response = await client.get(
-                f"https://lichess.org/api/games/user/{username}",
-                headers={"Accept": "application/x-ndjson"},
-                params={"max": limit, "pgnInJson": "true"},
-                timeout=15.0
-            )
-            
-            if response.status_code == 200:
-                # Lichess returns NDJSON
-                games = []
-                for line in response.text.strip().split('\n'):
-                    if line.strip():
-                        try:
-                            games.append(json.loads(line))
-                        except json.JSONDecodeError:
-                            continue
-                
-                processed_games = []
-                for game in games:
-                    white_player = game.get("players", {}).get("white", {})
-                    black_player = game.get("players", {}).get("black", {})
-                    
-                    processed_games.append({
-                        "id": game.get("id"),
-                        "white": white_player.get("user", {}).get("name"),
-                        "black": black_player.get("user", {}).get("name"),
-                        "result": game.get("status"),
-                        "time_control": f"{game.get('clock', {}).get('initial', 0)}+{game.get('clock', {}).get('increment', 0)}",
-                        "end_time": game.get("lastMoveAt", 0) // 1000,  # Convert to seconds
-                        "moves": game.get("moves"),
-                        "url": f"https://lichess.org/{game.get('id')}",
-                        "pgn": game.get("pgn", ""),
-                        "white": {
-                            "username": white_player.get("user", {}).get("name"),
-                            "rating": white_player.get("rating")
-                        },
-                        "black": {
-                            "username": black_player.get("user", {}).get("name"),
-                            "rating": black_player.get("rating")
-                        }
-                    })
-                
-                return {
-                    "platform": "lichess.org",
-                    "username": username,
-                    "games": processed_games,
-                    "total_found": len(processed_games),
-                    "requested": limit,
-                    "message": f"Found {len(processed_games)} games"
-                }
-            else:
+    try:
+        print(f"Fetching Lichess games for {username}, limit: {limit}")
+        async with client.stream(
+            "GET",
+            f"https://lichess.org/api/games/user/{username}",
+            headers={"Accept": "application/x-ndjson"},
+            params={"max": limit, "pgnInJson": "true"},
+            timeout=15.0
+        ) as response:
+            if response.status_code != 200:
                 raise HTTPException(status_code=response.status_code, detail=f"Lichess API error: {response.status_code}")
-                
-        except httpx.TimeoutException:
-            raise HTTPException(status_code=408, detail="Timeout fetching games from Lichess")
-        except Exception as e:
-            raise HTTPException(status_code=500, detail=f"Error fetching Lichess games: {str(e)}")
-
-    return {"games": [], "message": "No games found"}
+            
+            # Lichess returns NDJSON, so parse each game as its line arrives
+            games = []
+            async for line in response.aiter_lines():
+                if line.strip():
+                    try:
+                        games.append(orjson.loads(line))
+                    except orjson.JSONDecodeError:
+                        continue
+        
+        processed_games = [process_lichess_game(game) for game in games]
+        
+        return {
+            "platform": "lichess.org",
+            "username": username,
+            "games": processed_games,
+            "total_found": len(processed_games),
+            "requested": limit,
+            "message": f"Found {len(processed_games)} games"
+        }
+        
+    except httpx.TimeoutException:
+        raise HTTPException(status_code=408, detail="Timeout fetching games from Lichess")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error fetching Lichess games: {str(e)}")
 
 @app.delete("/api/chess-accounts/unlink/{platform}")
 async def unlink_chess_account(
     platform: str,
-    current_user: dict = Depends(get_current_user)
+    current_user: UserRecord = Depends(get_current_user)
 ):
     """Unlink a chess account"""
     platform = platform.lower()
     
-    if platform not in current_user["chess_accounts"]:
+    if platform not in current_user.chess_accounts:
         raise HTTPException(status_code=404, detail=f"No {platform} account linked")
     
-    del current_user["chess_accounts"][platform]
-    save_users_db(users_db)  # Persist changes
+    account = current_user.chess_accounts.pop(platform)
+    log_user_change(current_user)  # Persist changes
+    invalidate_games_cache(platform, account["username"])
     
     return {
         "success": True,
@@ -500,41 +766,50 @@ async def get_all_users():
         "total_users": len(users_db),
         "users": [
             {
-                "id": user["id"],
-                "username": user["username"],
-                "email": user["email"],
-                "created_at": user["created_at"],
-                "chess_accounts": list(user.get("chess_accounts", {}).keys()),
-                "games_imported": user.get("games_imported", 0)
+                "id": user.id,
+                "username": user.username,
+                "email": user.email,
+                "created_at": datetime.fromtimestamp(user.created_at, timezone.utc),
+                "chess_accounts": list(user.chess_accounts.keys()),
+                "games_imported": user.games_imported
             }
             for user in users_db.values()
         ]
     }
 
 # Existing chess endpoints
+# Static response bodies, serialized once at import
+ROOT_BODY = orjson.dumps({
+    "message": "Chess Learning Platform API", 
+    "version": "1.0.0",
+    "status": "running",
+    "features": ["authentication", "chess_account_linking", "game_analysis", "email_notifications"]
+})
+# users_count changes, so it is spliced between a fixed prefix and suffix
+HEALTH_BODY_PREFIX = orjson.dumps({"status": "healthy", "chess_lib": "available"})[:-1] + b',"users_count":'
+HEALTH_BODY_SUFFIX = b"}"
+_start_board = chess.Board()
+NEW_GAME_BODY = orjson.dumps({
+    "fen": _start_board.fen(),
+    "turn": "white" if _start_board.turn else "black",
+    "legal_moves": [move.uci() for move in _start_board.legal_moves][:10],
+    "game_over": _start_board.is_game_over()
+})
+
 @app.get("/")
 async def root():
-    return {
-        "message": "Chess Learning Platform API", 
-        "version": "1.0.0",
-        "status": "running",
-        "features": ["authentication", "chess_account_linking", "game_analysis", "email_notifications"]
-    }
+    return Response(content=ROOT_BODY, media_type="application/json")
 
 @app.get("/health")
 async def health_check():
-    return {"status": "healthy", "chess_lib": "available", "users_count": len(users_db)}
+    body = HEALTH_BODY_PREFIX + str(len(users_db)).encode() + HEALTH_BODY_SUFFIX
+    return Response(content=body, media_type="application/json")
 
 @app.get("/api/chess/new-game")
 async def new_game():
     """Start a new chess game"""
-    board = chess.Board()
-    return {
-        "fen": board.fen(),
-        "turn": "white" if board.turn else "black",
-        "legal_moves": [move.uci() for move in board.legal_moves][:10],
-        "game_over": board.is_game_over()
-    }
+    # Every new game starts from the same position
+    return Response(content=NEW_GAME_BODY, media_type="application/json")
 
 @app.post("/api/chess/make-move")
 async def make_move(move_data: dict):
@@ -556,4 +831,10 @@ async def make_move(move_data: dict):
         else:
             return {"success": False, "error": "Illegal move"}
     except Exception as e:
-        return {"success": False, "error": str(e)}
\ No newline at end of file
+        return {"success": False, "error": str(e)}
+
+if __name__ == "__main__":
+    import uvicorn
+    # uvloop and httptools ship with uvicorn[standard]. Keep a single worker:
+    # users_db, its change log and the caches all live in this process.
+    uvicorn.run(app, loop="uvloop", http="httptools")
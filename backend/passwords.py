@@ -0,0 +1,12 @@
+"""bcrypt work submitted to the process pool.
+
+Kept apart from main.py so pool workers can unpickle bcrypt_hash without
+importing the app (and loading the users database) in every worker.
+"""
+import bcrypt
+
+BCRYPT_ROUNDS = 12
+
+def bcrypt_hash(password: bytes) -> bytes:
+    """Salt and hash inside the pool worker, so only the password is sent over IPC"""
+    return bcrypt.hashpw(password, bcrypt.gensalt(BCRYPT_ROUNDS))
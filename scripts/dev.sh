@@ -12,7 +12,7 @@ sleep 5
 echo "🐍 Starting backend..."
 cd ../backend
 source venv/bin/activate
-uvicorn main:app --reload &
+uvicorn main:app --reload --loop uvloop --http httptools &
 BACKEND_PID=$!
 
 # Start frontend in background  